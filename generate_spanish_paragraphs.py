@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-\"\"\"generate_spanish_paragraphs.py
+"""generate_spanish_paragraphs.py
 Extrae 100 párrafos en español de fuentes variadas (novelas de dominio público, 
 noticias, blogs, Wikipedia, cuentos…), asegurando que cada párrafo procede de
 una URL distinta.  Guarda el resultado en un CSV con las columnas:
@@ -9,41 +9,58 @@ una URL distinta.  Guarda el resultado en un CSV con las columnas:
     - url
 
 DEPENDENCIAS:
-    pip install requests beautifulsoup4 feedparser pandas
+    pip install requests requests-cache lxml orjson
 
 USO:
     python generate_spanish_paragraphs.py
 El CSV se guardará como 'parrafos_es.csv' en el mismo directorio.
-\"\"\"
+"""
 
 import csv
+import io
 import random
 import re
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Tuple, Generator, Dict
+from typing import List, Tuple, Generator, Dict, Iterable
 
-import requests
-import feedparser
-from bs4 import BeautifulSoup
-import pandas as pd
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.html
+import orjson
+from lxml import etree
 
 ################################################################################
 # Utilidades generales
 ################################################################################
 
-def clean_html(raw_html: str) -> str:
-    \"\"\"Elimina etiquetas HTML y espacios extras.\"\"\"
-    soup = BeautifulSoup(raw_html, "html.parser")
-    text = soup.get_text(separator=' ', strip=True)
-    # normaliza espacios
-    text = re.sub(r'\\s+', ' ', text).strip()
-    return text
+_WS_RE = re.compile(r"\s+")
+_HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+def parse_html(html: str) -> lxml.html.HtmlElement:
+    """Parsea un documento HTML con lxml."""
+    # Se recodifica a bytes: lxml rechaza str con declaración de encoding
+    return lxml.html.fromstring(html.encode("utf-8"), parser=_HTML_PARSER)
+
+def first_long_p_stream(tree: lxml.html.HtmlElement, min_len: int = 120) -> str:
+    """Devuelve el primer <p> con longitud >= min_len, sin materializar el resto."""
+    for p in tree.iter("p"):
+        text = _WS_RE.sub(" ", p.text_content()).strip()
+        if len(text) >= min_len:
+            return text
+    return ""
 
 def first_long_paragraph(text: str, min_len: int = 120) -> str:
-    \"\"\"Devuelve el primer párrafo con longitud >= min_len.\"\"\"
-    for p in text.split('\\n'):
+    """Devuelve el primer párrafo con longitud >= min_len."""
+    return first_long_paragraph_from_lines(text.split("\n"), min_len)
+
+def first_long_paragraph_from_lines(lines: Iterable[str], min_len: int = 120) -> str:
+    """Igual que first_long_paragraph, pero consume las líneas de forma incremental."""
+    for p in lines:
         p = p.strip()
         if len(p) >= min_len:
             return p
@@ -74,32 +91,89 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; ParagraphBot/1.0; +https://example.com/bot)"
 }
 
+# Sesión compartida: reutiliza conexiones keep-alive entre peticiones al mismo host y
+# guarda las respuestas en disco (http_cache.sqlite) durante una hora entre ejecuciones.
+# Las URL aleatorias no se cachean (devolverían siempre lo mismo) ni Gutenberg, que se
+# lee en streaming y solo necesita el principio de cada libro.
+SESSION = requests_cache.CachedSession(
+    "http_cache",
+    expire_after=3600,
+    allowable_methods=["GET"],
+    urls_expire_after={
+        "es.wikipedia.org/api/rest_v1/page/random": requests_cache.DO_NOT_CACHE,
+        "cuentosparadormir.com/random": requests_cache.DO_NOT_CACHE,
+        "www.gutenberg.org": requests_cache.DO_NOT_CACHE,
+    },
+)
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32,
+                                      max_retries=Retry(total=3, backoff_factor=0.3)))
+
+MAX_WORKERS = 16  # descargas simultáneas
+
+# Se activa cuando main() alcanza el objetivo: los hilos en curso dejan de descargar
+STOP = threading.Event()
+
+def paragraph_from_article(link: str) -> str:
+    if STOP.is_set():
+        return ""
+    resp = SESSION.get(link, timeout=10)
+    if resp.status_code != 200:
+        return ""
+    return first_long_p_stream(parse_html(resp.text))
+
+def feed_links(rss_url: str) -> Generator[str, None, None]:
+    """Recorre un feed RSS/Atom con iterparse y devuelve el enlace de cada entrada."""
+    resp = SESSION.get(rss_url, timeout=10)
+    if resp.status_code != 200:
+        return
+    # La caché lee el cuerpo completo, así que se parsea desde resp.content
+    for _, item in etree.iterparse(io.BytesIO(resp.content), tag=("{*}item", "{*}entry"), recover=True):
+        link = fallback = ""
+        for child in item:
+            if not isinstance(child.tag, str) or etree.QName(child).localname != "link":
+                continue
+            # RSS guarda el enlace como texto; Atom en el atributo href
+            href = (child.get("href") or child.text or "").strip()
+            if not href:
+                continue
+            # Solo vale rel ausente o "alternate" (no "replies", "enclosure"...); si
+            # ninguno lo cumple se usa el primer <link> de la entrada
+            if child.get("rel", "alternate") == "alternate":
+                link = href
+                break
+            fallback = fallback or href
+        link = link or fallback
+        item.clear()
+        while item.getprevious() is not None:
+            del item.getparent()[0]
+        if link:
+            yield link
+
 def paragraphs_from_rss(rss_url: str, tipo: str) -> Generator[Tuple[str, str, str], None, None]:
-    \"\"\"Devuelve (texto, tipo, url) desde un RSS dado.\"\"\"
-    feed = feedparser.parse(rss_url)
-    for entry in feed.entries:
-        link = entry.get("link")
-        if not link:
-            continue
-        try:
-            resp = requests.get(link, headers=HEADERS, timeout=10)
-            if resp.status_code != 200:
+    """Devuelve (texto, tipo, url) desde un RSS dado."""
+    links = list(feed_links(rss_url))
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        futures = {ex.submit(paragraph_from_article, link): link for link in links}
+        for fut in as_completed(futures):
+            if STOP.is_set():
+                for f in futures:
+                    f.cancel()
+                return
+            try:
+                paragraph = fut.result()
+            except Exception:
                 continue
-            soup = BeautifulSoup(resp.text, "html.parser")
-            paragraphs = [clean_html(p.get_text()) for p in soup.find_all("p")]
-            paragraph = first_long_paragraph("\\n".join(paragraphs))
             if paragraph:
-                yield paragraph, tipo, link
-        except Exception:
-            continue
+                yield paragraph, tipo, futures[fut]
 
 ################################################################################
 # Wikipedia aleatoria en español
 ################################################################################
 
 def random_wikipedia_paragraph() -> Tuple[str, str, str]:
-    resp = requests.get("https://es.wikipedia.org/api/rest_v1/page/random/summary", headers=HEADERS, timeout=10)
-    data = resp.json()
+    resp = SESSION.get("https://es.wikipedia.org/api/rest_v1/page/random/summary", timeout=10)
+    data = orjson.loads(resp.content)
     extract = data.get("extract", "")
     url = data.get("content_urls", {}).get("desktop", {}).get("page", "")
     paragraph = first_long_paragraph(extract)
@@ -128,11 +202,16 @@ GUTENBERG_IDS = [
 
 def paragraph_from_gutenberg(gid: int) -> Tuple[str, str, str]:
     url = f"https://www.gutenberg.org/files/{gid}/{gid}-0.txt"
-    resp = requests.get(url, headers=HEADERS, timeout=15)
-    if resp.status_code != 200:
-        raise RuntimeError("No se pudo descargar Gutenber.")
-    text = resp.text
-    paragraph = first_long_paragraph(text)
+    # Descarga en streaming: se corta en cuanto aparece el primer párrafo válido
+    with SESSION.get(url, stream=True, timeout=15) as resp:
+        if resp.status_code != 200:
+            raise RuntimeError("No se pudo descargar Gutenber.")
+        # TextIOWrapper une los \r\n partidos entre bloques; iter_lines() puede
+        # emitir una línea vacía espuria en ese corte y partir un párrafo
+        resp.raw.decode_content = True
+        resp.raw.auto_close = False  # si no, urllib3 se cierra antes de que lea el wrapper
+        lines = io.TextIOWrapper(resp.raw, encoding=resp.encoding or "utf-8", errors="replace")
+        paragraph = first_long_paragraph_from_lines(line.rstrip("\n") for line in lines)
     return paragraph, "novela", url
 
 ################################################################################
@@ -141,13 +220,11 @@ def paragraph_from_gutenberg(gid: int) -> Tuple[str, str, str]:
 
 def random_cuento_paragraph() -> Tuple[str, str, str]:
     base = "https://cuentosparadormir.com/random"
-    resp = requests.get(base, headers=HEADERS, timeout=10, allow_redirects=True)
+    resp = SESSION.get(base, timeout=10, allow_redirects=True)
     if resp.status_code != 200:
         raise RuntimeError("No se pudo descargar cuento corto.")
     url = resp.url  # redirect final
-    soup = BeautifulSoup(resp.text, "html.parser")
-    paragraphs = [clean_html(p.get_text()) for p in soup.find_all("p")]
-    paragraph = first_long_paragraph("\\n".join(paragraphs))
+    paragraph = first_long_p_stream(parse_html(resp.text))
     return paragraph, "cuento", url
 
 ################################################################################
@@ -156,6 +233,7 @@ def random_cuento_paragraph() -> Tuple[str, str, str]:
 
 def main():
     random.seed(time.time())
+    STOP.clear()  # por si main() ya se ejecutó antes en este proceso
     collected: List[Tuple[str, str, str]] = []
     seen_urls = set()
 
@@ -180,18 +258,24 @@ def main():
     # Mezcla generadores
     random.shuffle(generators)
 
-    for gen in generators:
-        try:
-            for paragraph, tipo, url in gen():
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        futures = [ex.submit(lambda g=gen: list(g())) for gen in generators]
+        for fut in as_completed(futures):
+            try:
+                results = fut.result()
+            except Exception:
+                continue
+            for paragraph, tipo, url in results:
                 if url not in seen_urls and len(paragraph.split()) > 20:
                     collected.append((paragraph, tipo, url))
                     seen_urls.add(url)
                     if len(collected) >= 100:
-                        raise StopIteration
-        except StopIteration:
-            break
-        except Exception:
-            continue
+                        break
+            if len(collected) >= 100:
+                STOP.set()
+                for f in futures:
+                    f.cancel()
+                break
 
     if len(collected) < 100:
         print(f"Advertencia: solo se recolectaron {len(collected)} párrafos.")
@@ -199,9 +283,11 @@ def main():
         print("Se recolectaron 100 párrafos.")
 
     # Guardar CSV
-    df = pd.DataFrame(collected, columns=["texto", "tipo", "url"])
     csv_path = Path("parrafos_es.csv")
-    df.to_csv(csv_path, index=False, quoting=csv.QUOTE_ALL, encoding="utf-8")
+    with csv_path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator="\n")
+        writer.writerow(["texto", "tipo", "url"])
+        writer.writerows(collected)
     print(f"CSV guardado en {csv_path.resolve()}")
 
 if __name__ == "__main__":
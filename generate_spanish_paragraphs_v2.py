@@ -20,7 +20,7 @@ Modifica la variable TARGET_COUNT justo debajo para indicar cuántos párrafos q
 
 DEPENDENCIAS
 ------------
-pip install requests beautifulsoup4 feedparser pandas tldextract
+pip install requests requests-cache lxml orjson tldextract
 
 USO
 ----
@@ -30,17 +30,23 @@ from __future__ import annotations
 
 import argparse
 import csv
+import functools
+import io
 import random
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Generator, List, Tuple
+from typing import Dict, Generator, Iterable, List, Set, Tuple
 
 import tldextract
-import feedparser
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.html
+import orjson
+from lxml import etree
 
 ###############################################################################
 # === CONFIGURACIÓN MODIFICABLE ===============================================
@@ -48,6 +54,7 @@ from bs4 import BeautifulSoup
 
 TARGET_COUNT: int = 100  # <- CAMBIA ESTE VALOR SI QUIERES MÁS O MENOS PÁRRAFOS
 MIN_PARAGRAPH_LEN: int = 120  # longitud mínima en caracteres de cada párrafo
+MAX_WORKERS: int = 16  # descargas simultáneas
 
 HEADERS: Dict[str, str] = {
     "User-Agent": (
@@ -57,6 +64,27 @@ HEADERS: Dict[str, str] = {
     )
 }
 
+# Sesión compartida: reutiliza conexiones keep-alive entre peticiones al mismo host y
+# guarda las respuestas en disco (http_cache.sqlite) durante una hora entre ejecuciones.
+# Las URL aleatorias no se cachean (devolverían siempre lo mismo) ni Gutenberg, que se
+# lee en streaming y solo necesita el principio de cada libro.
+SESSION = requests_cache.CachedSession(
+    "http_cache",
+    expire_after=3600,
+    allowable_methods=["GET"],
+    urls_expire_after={
+        "es.wikipedia.org/api/rest_v1/page/random": requests_cache.DO_NOT_CACHE,
+        "cuentosparadormir.com/random": requests_cache.DO_NOT_CACHE,
+        "www.gutenberg.org": requests_cache.DO_NOT_CACHE,
+    },
+)
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32,
+                                      max_retries=Retry(total=3, backoff_factor=0.3)))
+
+# Se activa cuando main() alcanza el objetivo: los hilos en curso dejan de descargar
+STOP = threading.Event()
+
 # Pausa (segundos) entre descargas "pesadas" (novelas PDF/TXT)
 HEAVY_DELAY_RANGE: Tuple[float, float] = (1.5, 3.5)
 
@@ -64,20 +92,52 @@ HEAVY_DELAY_RANGE: Tuple[float, float] = (1.5, 3.5)
 # === UTILIDADES ===============================================================
 ###############################################################################
 
-def clean_html(raw_html: str) -> str:
-    """Elimina HTML y normaliza espacios."""
-    soup = BeautifulSoup(raw_html, "html.parser")
-    text = soup.get_text(separator=" ", strip=True)
-    return re.sub(r"\s+", " ", text).strip()
+_WS_RE = re.compile(r"\s+")
+_PARA_SPLIT_RE = re.compile(r"\n\s*\n")
+_TPL_RE = re.compile(r"\{\{.*?\}\}", re.DOTALL)
+_HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+def parse_html(html: str) -> lxml.html.HtmlElement:
+    """Parsea un documento HTML con lxml."""
+    # Se recodifica a bytes: lxml rechaza str con declaración de encoding
+    return lxml.html.fromstring(html.encode("utf-8"), parser=_HTML_PARSER)
+
+def first_long_p_stream(tree: lxml.html.HtmlElement, min_len: int = MIN_PARAGRAPH_LEN) -> str:
+    """Devuelve el primer <p> con longitud >= min_len, sin materializar el resto."""
+    for p in tree.iter("p"):
+        text = _WS_RE.sub(" ", p.text_content()).strip()
+        if len(text) >= min_len:
+            return text
+    return ""
 
 def first_long_paragraph(text: str, min_len: int = MIN_PARAGRAPH_LEN) -> str:
     """Devuelve el primer párrafo >= min_len."""
-    for p in re.split(r"\n\s*\n", text):
-        p = p.strip()
+    # Recorre los separadores con finditer y corta en el primer párrafo válido,
+    # sin partir el texto completo como hacía re.split
+    start = 0
+    for sep in _PARA_SPLIT_RE.finditer(text):
+        p = text[start:sep.start()].strip()
         if len(p) >= min_len:
             return p
-    return ""
+        start = sep.end()
+    p = text[start:].strip()
+    return p if len(p) >= min_len else ""
+
+def first_long_paragraph_from_lines(lines: Iterable[str], min_len: int = MIN_PARAGRAPH_LEN) -> str:
+    """Igual que first_long_paragraph, pero consume las líneas de forma incremental."""
+    buf: List[str] = []
+    for line in lines:
+        if line.strip():
+            buf.append(line)
+            continue
+        p = "\n".join(buf).strip()
+        if len(p) >= min_len:
+            return p
+        buf = []
+    p = "\n".join(buf).strip()
+    return p if len(p) >= min_len else ""
 
+@functools.lru_cache(maxsize=4096)
 def domain(url: str) -> str:
     ext = tldextract.extract(url)
     return f"{ext.domain}.{ext.suffix}"
@@ -129,23 +189,58 @@ CUENTOS_RANDOM_BASE: str = "https://cuentosparadormir.com/random"
 
 from typing import Iterator
 
+def paragraph_from_article(link: str) -> str:
+    if STOP.is_set():
+        return ""
+    resp = SESSION.get(link, timeout=12)
+    if resp.status_code != 200:
+        return ""
+    return first_long_p_stream(parse_html(resp.text))
+
+def feed_links(rss_url: str) -> Iterator[str]:
+    """Recorre un feed RSS/Atom con iterparse y devuelve el enlace de cada entrada."""
+    resp = SESSION.get(rss_url, timeout=12)
+    if resp.status_code != 200:
+        return
+    # La caché lee el cuerpo completo, así que se parsea desde resp.content
+    for _, item in etree.iterparse(io.BytesIO(resp.content), tag=("{*}item", "{*}entry"), recover=True):
+        link = fallback = ""
+        for child in item:
+            if not isinstance(child.tag, str) or etree.QName(child).localname != "link":
+                continue
+            # RSS guarda el enlace como texto; Atom en el atributo href
+            href = (child.get("href") or child.text or "").strip()
+            if not href:
+                continue
+            # Solo vale rel ausente o "alternate" (no "replies", "enclosure"...); si
+            # ninguno lo cumple se usa el primer <link> de la entrada
+            if child.get("rel", "alternate") == "alternate":
+                link = href
+                break
+            fallback = fallback or href
+        link = link or fallback
+        item.clear()
+        while item.getprevious() is not None:
+            del item.getparent()[0]
+        if link:
+            yield link
+
 def paragraphs_from_rss(rss_url: str, tipo: str) -> Iterator[Tuple[str, str, str]]:
-    feed = feedparser.parse(rss_url)
-    for entry in feed.entries:
-        link = entry.get("link")
-        if not link:
-            continue
-        try:
-            resp = requests.get(link, headers=HEADERS, timeout=12)
-            if resp.status_code != 200:
+    links = list(feed_links(rss_url))
+    # Los artículos se descargan en paralelo; pool propio para no bloquear el de main()
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        futures = {ex.submit(paragraph_from_article, link): link for link in links}
+        for fut in as_completed(futures):
+            if STOP.is_set():
+                for f in futures:
+                    f.cancel()
+                return
+            try:
+                paragraph = fut.result()
+            except Exception:
                 continue
-            soup = BeautifulSoup(resp.text, "html.parser")
-            paragraphs = [clean_html(p.get_text()) for p in soup.find_all("p")]
-            paragraph = first_long_paragraph("\n".join(paragraphs))
             if paragraph:
-                yield paragraph, tipo, link
-        except Exception:
-            continue
+                yield paragraph, tipo, futures[fut]
 
 def paragraph_from_gutenberg(gid: int) -> Tuple[str, str, str]:
     urls_try = [
@@ -153,37 +248,46 @@ def paragraph_from_gutenberg(gid: int) -> Tuple[str, str, str]:
         f"https://www.gutenberg.org/files/{gid}/{gid}-0.txt",
     ]
     for url in urls_try:
-        resp = requests.get(url, headers=HEADERS, timeout=20)
-        if resp.status_code == 200:
-            paragraph = first_long_paragraph(resp.text)
-            if paragraph:
-                time.sleep(random.uniform(*HEAVY_DELAY_RANGE))
-                return paragraph, "novela", url
+        if STOP.is_set():
+            break
+        # Descarga en streaming: se corta en cuanto aparece el primer párrafo válido
+        with SESSION.get(url, stream=True, timeout=20) as resp:
+            if resp.status_code != 200:
+                continue
+            # TextIOWrapper une los \r\n partidos entre bloques; iter_lines() puede
+            # emitir una línea vacía espuria en ese corte y partir un párrafo
+            resp.raw.decode_content = True
+            resp.raw.auto_close = False  # si no, urllib3 se cierra antes de que lea el wrapper
+            lines = io.TextIOWrapper(resp.raw, encoding=resp.encoding or "utf-8", errors="replace")
+            paragraph = first_long_paragraph_from_lines(line.rstrip("\n") for line in lines)
+        if paragraph:
+            time.sleep(random.uniform(*HEAVY_DELAY_RANGE))
+            return paragraph, "novela", url
     raise RuntimeError("Gutenberg falló")
 
 def paragraph_from_cervantes(url: str) -> Tuple[str, str, str]:
-    resp = requests.get(url, headers=HEADERS, timeout=20)
+    if STOP.is_set():
+        raise RuntimeError("Cervantes cancelado")
+    resp = SESSION.get(url, timeout=20)
     resp.encoding = "utf-8"
     if resp.status_code != 200:
         raise RuntimeError("Cervantes falló")
-    soup = BeautifulSoup(resp.text, "html.parser")
-    paragraphs = [clean_html(p.get_text()) for p in soup.find_all("p")]
-    paragraph = first_long_paragraph("\n".join(paragraphs))
+    paragraph = first_long_p_stream(parse_html(resp.text))
     time.sleep(random.uniform(*HEAVY_DELAY_RANGE))
     return paragraph, "novela", url
 
 def paragraph_from_wikisource(url: str) -> Tuple[str, str, str]:
-    resp = requests.get(url + "?action=raw", headers=HEADERS, timeout=15)
+    resp = SESSION.get(url + "?action=raw", timeout=15)
     if resp.status_code != 200:
         raise RuntimeError("Wikisource falló")
     text = resp.text
-    text = re.sub(r"\{\{.*?\}\}", "", text, flags=re.DOTALL)
+    text = _TPL_RE.sub("", text)
     paragraph = first_long_paragraph(text)
     return paragraph, "cuento", url
 
 def random_wikipedia_paragraph() -> Tuple[str, str, str]:
     api_url = "https://es.wikipedia.org/api/rest_v1/page/random/summary"
-    data = requests.get(api_url, headers=HEADERS, timeout=10).json()
+    data = orjson.loads(SESSION.get(api_url, timeout=10).content)
     extract = data.get("extract", "")
     url = data.get("content_urls", {}).get("desktop", {}).get("page", "")
     paragraph = first_long_paragraph(extract)
@@ -192,30 +296,30 @@ def random_wikipedia_paragraph() -> Tuple[str, str, str]:
     raise RuntimeError("Wikipedia vacío")
 
 def random_cuento_paragraph() -> Tuple[str, str, str]:
-    resp = requests.get(CUENTOS_RANDOM_BASE, headers=HEADERS, timeout=10, allow_redirects=True)
+    resp = SESSION.get(CUENTOS_RANDOM_BASE, timeout=10, allow_redirects=True)
     if resp.status_code != 200:
         raise RuntimeError("Cuento corto falló")
     url = resp.url
-    soup = BeautifulSoup(resp.text, "html.parser")
-    paragraphs = [clean_html(p.get_text()) for p in soup.find_all("p")]
-    paragraph = first_long_paragraph("\n".join(paragraphs))
+    paragraph = first_long_p_stream(parse_html(resp.text))
     return paragraph, "cuento", url
 
 ###############################################################################
 # === PRINCIPAL ================================================================
 ###############################################################################
 
-def build_generators() -> List[callable]:
+def build_generators() -> Tuple[List[callable], List[callable]]:
+    """Devuelve (ligeros, pesados); los pesados son las descargas de novelas."""
     gens: List[callable] = []
+    heavy: List[callable] = []
     for tipo, rss_list in RSS_SOURCES.items():
         for rss in rss_list:
             gens.append(lambda r=rss, t=tipo: paragraphs_from_rss(r, t))
 
     for gid in GUTENBERG_IDS:
-        gens.append(lambda g=gid: [paragraph_from_gutenberg(g)])
+        heavy.append(lambda g=gid: [paragraph_from_gutenberg(g)])
 
     for url in CERVANTES_URLS:
-        gens.append(lambda u=url: [paragraph_from_cervantes(u)])
+        heavy.append(lambda u=url: [paragraph_from_cervantes(u)])
 
     for url in WIKISOURCE_PAGES:
         gens.append(lambda u=url: [paragraph_from_wikisource(u)])
@@ -224,7 +328,8 @@ def build_generators() -> List[callable]:
     gens.append(lambda: [random_cuento_paragraph()])
 
     random.shuffle(gens)
-    return gens
+    random.shuffle(heavy)
+    return gens, heavy
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Recolecta párrafos en español.")
@@ -237,27 +342,43 @@ def main() -> None:
     goal = args.n
     collected: List[Tuple[str, str, str]] = []
     seen_urls = set()
-
-    for gen in build_generators():
-        try:
-            for paragraph, tipo, url in gen():
-                if url in seen_urls or domain(url) in {domain(u) for u in seen_urls}:
+    seen_domains: Set[str] = set()
+
+    STOP.clear()  # por si main() ya se ejecutó antes en este proceso
+    gens, heavy = build_generators()
+    # Las descargas pesadas van en su propio pool de un solo hilo: se hacen de una en
+    # una (la pausa de HEAVY_DELAY_RANGE sigue espaciándolas) sin ocupar los hilos
+    # que usan el resto de fuentes
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex, ThreadPoolExecutor(max_workers=1) as heavy_ex:
+        futures = [ex.submit(lambda g=gen: list(g())) for gen in gens]
+        futures += [heavy_ex.submit(lambda g=gen: list(g())) for gen in heavy]
+        for fut in as_completed(futures):
+            try:
+                results = fut.result()
+            except Exception:
+                continue
+            for paragraph, tipo, url in results:
+                if url in seen_urls or domain(url) in seen_domains:
                     continue
                 if len(paragraph) < MIN_PARAGRAPH_LEN:
                     continue
                 collected.append((paragraph, tipo, url))
                 seen_urls.add(url)
+                seen_domains.add(domain(url))
                 if len(collected) >= goal:
-                    raise StopIteration
-        except StopIteration:
-            break
-        except Exception:
-            continue
+                    break
+            if len(collected) >= goal:
+                STOP.set()
+                for f in futures:
+                    f.cancel()
+                break
 
     print(f"Se obtuvieron {len(collected)} párrafos (objetivo={goal}).")
 
-    df = pd.DataFrame(collected, columns=["texto", "tipo", "url"])
-    df.to_csv(args.outfile, index=False, quoting=csv.QUOTE_ALL, encoding="utf-8")
+    with open(args.outfile, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator="\n")
+        writer.writerow(["texto", "tipo", "url"])
+        writer.writerows(collected)
     print(f"CSV guardado en {Path(args.outfile).resolve()}")
     if len(collected) < goal:
         print("Advertencia: no se alcanzó la cifra solicitada; aumenta las fuentes o baja MIN_PARAGRAPH_LEN.")
@@ -1,51 +1,125 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
 import streamlit as st
-from transformers import BertModel, BertTokenizer
+from transformers import BertTokenizerFast
 from sklearn.ensemble import RandomForestClassifier
 import joblib
-import torch
 import numpy as np
+import onnxruntime as ort
+from onnxruntime.quantization import QuantType, quantize_dynamic
+
+ONNX_PATH = Path('bert-base-multilingual-cased.onnx')
+ONNX_INT8_PATH = Path('bert-base-multilingual-cased-int8.onnx')
+# El clasificador se entrenó con embeddings fp32; la versión int8 es opcional
+# (BERT_ONNX_INT8=1) hasta comprobar que no cambia sus predicciones
+USE_INT8 = os.environ.get('BERT_ONNX_INT8') == '1'
+
+# ---------------------------
+# Exportar BERT a ONNX (solo la primera vez)
+# ---------------------------
+def export_onnx(tokenizer):
+    # torch solo hace falta para exportar; las cargas siguientes abren el .onnx directamente
+    import torch
+    from transformers import BertModel
+
+    bert_model = BertModel.from_pretrained('bert-base-multilingual-cased').eval()
+    example = tokenizer("texto de ejemplo", return_tensors='pt')
+    axes = {0: 'batch', 1: 'seq'}
+    with torch.no_grad():
+        torch.onnx.export(
+            bert_model, (example['input_ids'], example['attention_mask']), str(ONNX_PATH),
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['last_hidden_state', 'pooler_output'],
+            dynamic_shapes={'input_ids': axes, 'attention_mask': axes},
+            dynamo=True, opset_version=18,
+        )
 
 # ---------------------------
 # Cargar modelo BERT y clasificador entrenado
 # ---------------------------
 @st.cache_resource
 def load_model():
-    tokenizer = BertTokenizer.from_pretrained('bert-base-multilingual-cased')  # ¡IMPORTANTE!
-    bert = BertModel.from_pretrained('bert-base-multilingual-cased')            # ¡IMPORTANTE!
+    tokenizer = BertTokenizerFast.from_pretrained('bert-base-multilingual-cased')  # ¡IMPORTANTE!
+    if not ONNX_PATH.exists():
+        export_onnx(tokenizer)
+    # ONNX Runtime ya fusiona el grafo (LayerNorm, GELU, atención) al crear la sesión:
+    # graph_optimization_level vale ORT_ENABLE_ALL por defecto
+    so = ort.SessionOptions()
+    so.intra_op_num_threads = os.cpu_count()
+    if "CUDAExecutionProvider" in ort.get_available_providers():
+        # La cuantización dinámica solo acelera en CPU; en GPU se usa el grafo fp32
+        session = ort.InferenceSession(str(ONNX_PATH), sess_options=so,
+                                       providers=["CUDAExecutionProvider", "CPUExecutionProvider"])
+    elif USE_INT8:
+        if not ONNX_INT8_PATH.exists():
+            # Versión int8 para CPU: ONNX Runtime cuantiza los pesos de las MatMul
+            quantize_dynamic(str(ONNX_PATH), str(ONNX_INT8_PATH), weight_type=QuantType.QInt8)
+        session = ort.InferenceSession(str(ONNX_INT8_PATH), sess_options=so,
+                                       providers=["CPUExecutionProvider"])
+    else:
+        session = ort.InferenceSession(str(ONNX_PATH), sess_options=so,
+                                       providers=["CPUExecutionProvider"])
     clf = joblib.load('modelo_random_forest_entrenado.pkl')  # Asegúrate de que esta ruta sea válida
-    return tokenizer, bert, clf
+    return tokenizer, session, clf
 
-tokenizer, bert_model, clf = load_model()
+tokenizer, session, clf = load_model()
 
 # ---------------------------
-# Función para extraer embedding del texto
+# Función para extraer embeddings de un lote de textos
 # ---------------------------
-def embed_text(text):
-    tokens = tokenizer(text, return_tensors='pt', truncation=True, padding='max_length', max_length=512)
-    with torch.no_grad():
-        outputs = bert_model(**tokens)
-    cls_embedding = outputs.last_hidden_state[:, 0, :]  # Extraemos el vector [CLS]
-    return cls_embedding[0].numpy()
+EMBED_CACHE_SIZE = 512
+
+@st.cache_resource
+def embedding_cache():
+    # Compartida entre sesiones: digest BLAKE2b del texto -> embedding (LRU)
+    return OrderedDict(), threading.Lock()
+
+def _run_bert(texts):
+    tokens = tokenizer(texts, return_tensors='np', truncation=True, padding=True, max_length=512)
+    feeds = {"input_ids": tokens["input_ids"], "attention_mask": tokens["attention_mask"]}
+    outputs = session.run(["last_hidden_state"], feeds)
+    return outputs[0][:, 0, :]  # Extraemos el vector [CLS] de cada texto
+
+def embed_texts(texts):
+    cache, lock = embedding_cache()
+    digests = [hashlib.blake2b(t.encode("utf-8"), digest_size=16).digest() for t in texts]
+    with lock:
+        known = {d: cache[d] for d in digests if d in cache}
+    # Solo los textos no vistos pasan por BERT, todos juntos en un único lote
+    misses = {d: t for d, t in zip(digests, texts) if d not in known}
+    if misses:
+        known.update(zip(misses, _run_bert(list(misses.values()))))
+    with lock:
+        for d in digests:
+            cache[d] = known[d]
+            cache.move_to_end(d)
+        while len(cache) > EMBED_CACHE_SIZE:
+            cache.popitem(last=False)
+    return np.vstack([known[d] for d in digests])
 
 # ---------------------------
 # Interfaz de usuario
 # ---------------------------
 st.title("🔍 Detector de textos generados por IA")
-st.write("Sube un archivo de texto para analizar si fue escrito por una inteligencia artificial o por un humano.")
+st.write("Sube uno o varios archivos de texto para analizar si fueron escritos por una inteligencia artificial o por un humano.")
 
-uploaded_file = st.file_uploader("📄 Sube tu archivo .txt", type=["txt"])
+uploaded_files = st.file_uploader("📄 Sube tus archivos .txt", type=["txt"], accept_multiple_files=True)
 
-if uploaded_file is not None:
-    content = uploaded_file.read().decode("utf-8")
-    st.text_area("📚 Texto analizado:", content, height=200)
+if uploaded_files:
+    contents = [f.read().decode("utf-8") for f in uploaded_files]
 
-    # Obtener embedding y hacer predicción
-    embedding = embed_text(content)
-    prediction = clf.predict([embedding])[0]
+    # Un único forward de BERT y una única llamada a predict para todo el lote
+    predictions = clf.predict(embed_texts(contents))
 
-    st.markdown("---")
-    st.subheader("🧠 Resultado")
-    if prediction == "ia":
-        st.error("❌ El texto parece haber sido generado por IA.")
-    else:
-        st.success("✅ El texto parece haber sido escrito por un humano.")
\ No newline at end of file
+    for i, (uploaded_file, content, prediction) in enumerate(zip(uploaded_files, contents, predictions)):
+        st.markdown("---")
+        st.text_area(f"📚 Texto analizado ({uploaded_file.name}):", content, height=200, key=f"texto_{i}")
+        st.subheader("🧠 Resultado")
+        if prediction == "ia":
+            st.error("❌ El texto parece haber sido generado por IA.")
+        else:
+            st.success("✅ El texto parece haber sido escrito por un humano.")
\ No newline at end of file